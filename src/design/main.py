@@ -20,6 +20,13 @@ import os
 import json
 import math
 
+import numpy as np
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 sys.path.insert(0, os.path.dirname(__file__))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
@@ -38,8 +45,8 @@ else:
     sys.exit(1)
 
 print(f"Loading parameters: {params_path}")
-with open(params_path, 'r') as p:
-    params = json.load(p)
+with open(params_path, 'rb') as p:
+    params = json_loads(p.read())
 
 boat = params.get('boat_name', 'unknown')
 configuration = params.get('configuration_name', 'unknown')
@@ -84,7 +91,9 @@ for doc_name in App.listDocuments():
 doc_name = f"Keelboat {boat} {configuration}"
 doc = App.newDocument(doc_name)
 App.setActiveDocument(doc.Name)
-doc.recompute()
+# No undo stack: otherwise every Shape assignment keeps a BRep copy.
+# The document is recomputed once, after all features are added.
+doc.UndoMode = 0
 
 vessel = doc.addObject("App::Part", "Vessel")
 
@@ -98,40 +107,61 @@ hull_length = params['hull_length']
 hull_beam = params['hull_beam']
 hull_depth = params['hull_depth']
 hull_thickness = params['hull_thickness']
+deck_level = params['deck_level']
 num_sections = params.get('hull_sections', 7)
 
 half_length = hull_length / 2
 half_beam = hull_beam / 2
 
+# Section parameter t runs 0 (keel bottom) to 1 (sheer); the sine
+# distribution is shared by every section, only hw and hd scale it.
+SECTION_POINTS = 8
+SECTION_T = np.linspace(0.0, 1.0, SECTION_POINTS + 1)
+SECTION_SIN = np.sin(SECTION_T * math.pi / 2)
+SECTION_TOLERANCE = hull_thickness * 0.1
+
+
+def section_xz(t, sin_t, hw, hd):
+    """Numeric core of hull_section_points, filling one (2n - 1, 2) array."""
+    n = t.shape[0]
+    pts = np.empty((2 * n - 1, 2))
+
+    # Starboard side, bottom to top
+    stbd = pts[n - 1:]
+    stbd[:, 0] = hw * sin_t
+    stbd[:, 1] = -hd * (1.0 - t)
+
+    # Mirror to port (reversed, skip centerline duplicate)
+    port = pts[:n - 1]
+    port[:] = stbd[:0:-1]
+    port[:, 0] *= -1.0
+    return pts
+
+
 def hull_section_points(hw, hd):
     """
     Generate the U-shaped cross-section points for half-width hw, depth hd.
-    Returns list of points from port sheer through keel to starboard sheer.
+    Returns an (N, 2) array of (x, z) from port sheer through keel to
+    starboard sheer.
     Origin at section centroid, sheer at z=0, keel at z=-hd.
     """
-    n_pts = 12
-    # Starboard side, bottom to top
-    stbd = []
-    for i in range(n_pts + 1):
-        t = i / n_pts  # 0 = keel bottom, 1 = sheer
-        x = hw * math.sin(t * math.pi / 2)
-        z = -hd * (1 - t)
-        stbd.append((x, z))
-
-    # Mirror to port (reversed, skip centerline duplicate)
-    port = [(-x, z) for x, z in reversed(stbd[1:])]
-    return port + stbd
+    return section_xz(SECTION_T, SECTION_SIN, float(hw), float(hd))
 
 
 def hull_section_wire(y_pos, hw, hd):
     """
     Create a closed hull cross-section wire at longitudinal position y_pos.
     """
+    vector = Base.Vector  # local binding, looked up once per section
     pts = hull_section_points(hw, hd)
-    vecs = [Base.Vector(x, y_pos, z) for x, z in pts]
+    vecs = [vector(x, y_pos, z) for x, z in pts.tolist()]
 
+    # Approximate rather than interpolate: a smooth section does not need
+    # to pass exactly through every sample, and fewer poles keep the loft
+    # cheap.  End points are still matched exactly.
     spline = Part.BSplineCurve()
-    spline.interpolate(vecs)
+    spline.approximate(Points=vecs, DegMin=3, DegMax=5,
+                       Tolerance=SECTION_TOLERANCE, Continuity='C2')
     spline_edge = spline.toShape()
 
     # Close at the sheer line (deck edge)
@@ -139,14 +169,51 @@ def hull_section_wire(y_pos, hw, hd):
     return Part.Wire([spline_edge, closing_edge])
 
 
-def hull_section_wire_inner(y_pos, hw, hd, thickness):
+# Section wires built at y=0, keyed by (hw, hd).  Stations with the same
+# profile (flat stretches of the shape table) reuse one BSpline and only
+# translate it into place.
+section_wire_cache = {}
+
+
+def cached_section_wire(y_pos, hw, hd):
     """
-    Create an inner hull section wire, offset inward by thickness.
-    The inner section has reduced half-width and depth.
+    Return a hull section wire at y_pos, building each distinct (hw, hd)
+    profile only once and translating a copy to the station.
     """
-    inner_hw = max(hw - thickness, thickness)
-    inner_hd = max(hd - thickness, thickness)
-    return hull_section_wire(y_pos, inner_hw, inner_hd)
+    key = (round(hw, 6), round(hd, 6))
+    base_wire = section_wire_cache.get(key)
+    if base_wire is None:
+        base_wire = hull_section_wire(0, hw, hd)
+        section_wire_cache[key] = base_wire
+    wire = base_wire.copy()
+    wire.translate(Base.Vector(0, y_pos, 0))
+    return wire
+
+
+def section_curve(wire):
+    """
+    Return the BSpline edge of a section wire, whatever the edge order of
+    the copied wire; the other edge is the straight sheer closure.
+    """
+    return next(edge for edge in wire.Edges
+                if isinstance(edge.Curve, Part.BSplineCurve))
+
+
+def hull_shell_section_wire(outer_wire, inner_wire):
+    """
+    Join an outer and inner section into one closed U-shaped band:
+    outer curve, starboard sheer rim, inner curve, port sheer rim.
+    """
+    outer_curve = section_curve(outer_wire)
+    inner_curve = section_curve(inner_wire)
+    return Part.Wire([
+        outer_curve,
+        Part.makeLine(outer_curve.lastVertex().Point,
+                      inner_curve.lastVertex().Point),
+        inner_curve,
+        Part.makeLine(inner_curve.firstVertex().Point,
+                      outer_curve.firstVertex().Point),
+    ])
 
 
 # Generate sections along the hull length
@@ -172,19 +239,12 @@ hull_shape_table = [
 ]
 
 
-def interp_table(frac):
-    """Linearly interpolate beam_frac and depth_frac from hull_shape_table."""
-    if frac <= hull_shape_table[0][0]:
-        return hull_shape_table[0][1], hull_shape_table[0][2]
-    if frac >= hull_shape_table[-1][0]:
-        return hull_shape_table[-1][1], hull_shape_table[-1][2]
-    for j in range(len(hull_shape_table) - 1):
-        f0, b0, d0 = hull_shape_table[j]
-        f1, b1, d1 = hull_shape_table[j + 1]
-        if f0 <= frac <= f1:
-            t = (frac - f0) / (f1 - f0)
-            return b0 + t * (b1 - b0), d0 + t * (d1 - d0)
-    return hull_shape_table[-1][1], hull_shape_table[-1][2]
+# Control point columns for np.interp, which clamps to the end values
+# outside [0, 1] just like the table's stern and bow rows.
+hull_shape_array = np.array(hull_shape_table, dtype=np.float64)
+table_fracs = hull_shape_array[:, 0]
+table_beam_fracs = hull_shape_array[:, 1]
+table_depth_fracs = hull_shape_array[:, 2]
 
 
 # Non-uniform section spacing: denser at bow to prevent loft overshoot.
@@ -192,29 +252,53 @@ def interp_table(frac):
 n_base = max(num_sections, 11)
 fracs = [i / (n_base - 1) for i in range(n_base)]
 fracs += [0.88, 0.92, 0.96, 0.98]  # extra bow sections
-fracs = sorted(set(fracs))
+fracs = np.array(sorted(set(fracs)))
+y_positions = -half_length + fracs * hull_length
+hws = np.maximum(half_beam * np.interp(fracs, table_fracs, table_beam_fracs),
+                 hull_thickness * 2)
+hds = np.maximum(hull_depth * np.interp(fracs, table_fracs, table_depth_fracs),
+                 hull_thickness * 2)
+# Inner sections are offset inward by the shell thickness
+inner_hws = np.maximum(hws - hull_thickness, hull_thickness)
+inner_hds = np.maximum(hds - hull_thickness, hull_thickness)
 
 outer_wires = []
 inner_wires = []
-for frac in fracs:
-    y_pos = -half_length + frac * hull_length
-    bf, df = interp_table(frac)
-    hw = max(half_beam * bf, hull_thickness * 2)
-    hd = max(hull_depth * df, hull_thickness * 2)
-
-    outer_wires.append(hull_section_wire(y_pos, hw, hd))
-    inner_wires.append(hull_section_wire_inner(y_pos, hw, hd, hull_thickness))
-
-# Loft outer and inner hulls, subtract to get thin shell
+for y_pos, hw, hd, inner_hw, inner_hd in zip(
+        y_positions.tolist(), hws.tolist(), hds.tolist(),
+        inner_hws.tolist(), inner_hds.tolist()):
+    outer_wires.append(cached_section_wire(y_pos, hw, hd))
+    inner_wires.append(cached_section_wire(y_pos, inner_hw, inner_hd))
+
+# Loft the shell directly through the U-shaped bands between outer and
+# inner sections, which avoids a boolean cut of the two freeform solids.
+# The outer and inner lofts are still needed for the deck and air volume,
+# and are built first so the cut can stand in if the band loft fails.
+air_shape = None
 try:
     outer_loft = Part.makeLoft(outer_wires, True, False, False)
     inner_loft = Part.makeLoft(inner_wires, True, False, False)
-    hull_shell = outer_loft.cut(inner_loft)
+    # The air volume is a copy of the inner loft taken before any boolean,
+    # so the fallback cut below never touches the shape it stores
+    air_shape = inner_loft.copy()
+
+    hull_shell = None
+    try:
+        shell_wires = [hull_shell_section_wire(o, i)
+                       for o, i in zip(outer_wires, inner_wires)]
+        hull_shell = Part.makeLoft(shell_wires, True, False, False)
+        if not hull_shell.isValid():
+            print("  Warning: Hull shell loft invalid, subtracting inner loft")
+            hull_shell = None
+    except Exception as e:
+        print(f"  Warning: Hull shell loft failed ({e}), subtracting inner loft")
+    if hull_shell is None:
+        hull_shell = outer_loft.cut(inner_loft)
 
     hull_shell_obj = vessel.newObject("Part::Feature", "Hull_Shell__fiberglass")
     hull_shell_obj.Shape = hull_shell
     hull_shell_obj.Placement = App.Placement(
-        Base.Vector(0, 0, params['deck_level']),
+        Base.Vector(0, 0, deck_level),
         App.Rotation())
     print(f"  Hull shell: volume = {hull_shell.Volume / 1e6:.1f} liters")
     print(f"  (outer={outer_loft.Volume/1e6:.1f}L, inner={inner_loft.Volume/1e6:.1f}L)")
@@ -225,7 +309,7 @@ except Exception as e:
     hull_shell_obj = vessel.newObject("Part::Feature", "Hull_Shell__fiberglass")
     hull_shell_obj.Shape = hull_box
     hull_shell_obj.Placement = App.Placement(
-        Base.Vector(0, 0, params['deck_level']),
+        Base.Vector(0, 0, deck_level),
         App.Rotation())
 
 # ============================================================================
@@ -239,7 +323,7 @@ transom_solid = transom_face.extrude(Base.Vector(0, -hull_thickness, 0))
 transom_obj = vessel.newObject("Part::Feature", "Transom__fiberglass")
 transom_obj.Shape = transom_solid
 transom_obj.Placement = App.Placement(
-    Base.Vector(0, 0, params['deck_level']),
+    Base.Vector(0, 0, deck_level),
     App.Rotation())
 print(f"  Transom: volume = {transom_solid.Volume / 1e6:.2f} liters")
 
@@ -253,14 +337,14 @@ deck_thickness = hull_thickness
 # Using -0.5mm avoids the degenerate boundary at z=0.
 deck_wires = outer_loft.slice(Base.Vector(0, 0, 1), -0.5)
 deck_face = Part.Face(Part.Wire(deck_wires))
+deck_face.translate(Base.Vector(0, 0, 0.5))  # shift the planform back to z=0
 # Extrude upward from z=0
 deck_solid = deck_face.extrude(Base.Vector(0, 0, deck_thickness))
-deck_solid = deck_solid.translated(Base.Vector(0, 0, 0.5))  # shift back to z=0
 
 deck_obj = vessel.newObject("Part::Feature", "Deck__fiberglass")
 deck_obj.Shape = deck_solid
 deck_obj.Placement = App.Placement(
-    Base.Vector(0, 0, params['deck_level']),
+    Base.Vector(0, 0, deck_level),
     App.Rotation())
 
 # ============================================================================
@@ -275,6 +359,30 @@ keel_root_t = params['keel_root_thickness']
 keel_tip_t = params['keel_tip_thickness']
 keel_sweep = math.radians(params['keel_sweep_deg'])
 
+def closed_polygon(pts):
+    """Closed wire through pts, without repeating the first point."""
+    n = len(pts)
+    return Part.Wire([Part.makeLine(pts[i], pts[(i + 1) % n]) for i in range(n)])
+
+
+def ruled_solid(root_wire, tip_wire):
+    """
+    Closed solid between two polygons with matching edges: planar caps
+    plus one ruled face per edge pair, sewn together without a loft.
+    """
+    faces = [Part.Face(root_wire), Part.Face(tip_wire)]
+    faces += [Part.makeRuledSurface(root_edge, tip_edge)
+              for root_edge, tip_edge in zip(root_wire.Edges, tip_wire.Edges)]
+    shell = Part.Shell(faces)
+    shell.sewShape()
+    solid = Part.Solid(shell)
+    if solid.Volume < 0:
+        solid.reverse()
+    if not solid.isValid():
+        raise ValueError("sewn solid is not valid")
+    return solid
+
+
 # Keel as a tapered box (root at top, tip at bottom)
 # Root section (at hull bottom)
 root_hw = keel_root / 2
@@ -287,7 +395,7 @@ root_pts = [
     Base.Vector(root_ht, root_hw + root_y_offset, 0),
     Base.Vector(-root_ht, root_hw + root_y_offset, 0),
 ]
-root_wire = Part.makePolygon(root_pts + [root_pts[0]])
+root_wire = closed_polygon(root_pts)
 
 # Tip section (at bottom of keel)
 tip_hw = keel_tip / 2
@@ -300,19 +408,23 @@ tip_pts = [
     Base.Vector(tip_ht, tip_hw + sweep_offset, -keel_span),
     Base.Vector(-tip_ht, tip_hw + sweep_offset, -keel_span),
 ]
-tip_wire = Part.makePolygon(tip_pts + [tip_pts[0]])
+tip_wire = closed_polygon(tip_pts)
 
 try:
-    keel_shape = Part.makeLoft([root_wire, tip_wire], True)
+    keel_shape = ruled_solid(root_wire, tip_wire)
 except Exception as e:
-    print(f"  Warning: Keel loft failed ({e}), using box fallback")
-    keel_shape = Part.makeBox(keel_root_t, keel_root, keel_span,
-                              Base.Vector(-root_ht, -root_hw, -keel_span))
+    print(f"  Warning: Ruled keel failed ({e}), using loft")
+    try:
+        keel_shape = Part.makeLoft([root_wire, tip_wire], True)
+    except Exception as e:
+        print(f"  Warning: Keel loft failed ({e}), using box fallback")
+        keel_shape = Part.makeBox(keel_root_t, keel_root, keel_span,
+                                  Base.Vector(-root_ht, -root_hw, -keel_span))
 
 keel_obj = vessel.newObject("Part::Feature", "Keel__lead")
 keel_obj.Shape = keel_shape
 # Position at hull bottom, centered
-keel_z = params['deck_level'] - hull_depth
+keel_z = deck_level - hull_depth
 keel_obj.Placement = App.Placement(
     Base.Vector(0, 0, keel_z),
     App.Rotation())
@@ -333,7 +445,7 @@ rudder_shape = Part.makeBox(rudder_t, rudder_chord, rudder_span,
 
 rudder_obj = vessel.newObject("Part::Feature", "Rudder_Blade__wood")
 rudder_obj.Shape = rudder_shape
-rudder_z = params['deck_level'] - hull_depth
+rudder_z = deck_level - hull_depth
 rudder_obj.Placement = App.Placement(
     Base.Vector(0, rudder_y, rudder_z - rudder_span),
     App.Rotation())
@@ -345,7 +457,7 @@ rudder_obj.Placement = App.Placement(
 stock_d = params['rudder_stock_diameter']
 # Stock runs from bottom of rudder blade up to deck level
 stock_bottom_z = rudder_z - rudder_span
-stock_top_z = params['deck_level']
+stock_top_z = deck_level
 stock_l = stock_top_z - stock_bottom_z
 stock_shape = Part.makeCylinder(stock_d / 2, stock_l)
 
@@ -365,14 +477,20 @@ mast_d = params['mast_diameter']
 mast_t = params['mast_thickness']
 mast_y = params['mast_y_position']
 
-mast_outer = Part.makeCylinder(mast_d / 2, mast_h)
-mast_inner = Part.makeCylinder(mast_d / 2 - mast_t, mast_h)
-mast_shape = mast_outer.cut(mast_inner)
+def make_tube(outer_radius, wall, length):
+    """Hollow tube along +Z, extruded from an annulus (no boolean cut)."""
+    outer_wire = Part.Wire(Part.makeCircle(outer_radius))
+    inner_wire = Part.Wire(Part.makeCircle(outer_radius - wall))
+    annulus = Part.Face([outer_wire, inner_wire])
+    return annulus.extrude(Base.Vector(0, 0, length))
+
+
+mast_shape = make_tube(mast_d / 2, mast_t, mast_h)
 
 mast_obj = vessel.newObject("Part::Feature", "Mast__aluminum")
 mast_obj.Shape = mast_shape
 mast_obj.Placement = App.Placement(
-    Base.Vector(0, mast_y, params['deck_level']),
+    Base.Vector(0, mast_y, deck_level),
     App.Rotation())
 
 # ============================================================================
@@ -384,15 +502,13 @@ boom_d = params['boom_diameter']
 boom_t = params['boom_thickness']
 boom_z_above_deck = params['boom_height_above_deck']
 
-boom_outer = Part.makeCylinder(boom_d / 2, boom_l)
-boom_inner = Part.makeCylinder(boom_d / 2 - boom_t, boom_l)
-boom_shape = boom_outer.cut(boom_inner)
+boom_shape = make_tube(boom_d / 2, boom_t, boom_l)
 
 boom_obj = vessel.newObject("Part::Feature", "Boom__aluminum")
 boom_obj.Shape = boom_shape
 # Boom runs longitudinally aft from mast
 boom_obj.Placement = App.Placement(
-    Base.Vector(0, mast_y, params['deck_level'] + boom_z_above_deck),
+    Base.Vector(0, mast_y, deck_level + boom_z_above_deck),
     App.Rotation(Base.Vector(1, 0, 0), 90))
 
 # ============================================================================
@@ -400,11 +516,15 @@ boom_obj.Placement = App.Placement(
 # ============================================================================
 
 print("Creating air volume...")
-# Air volume is the inner hull loft (the space enclosed by the hull shell)
-try:
-    air_shape = inner_loft
+# Air volume is the inner hull loft (the space enclosed by the hull shell).
+# Buoyancy needs the solid; with air_as_solid=false only the inner section
+# wires are stored, which keeps the saved file small.
+if air_shape is not None:
     print(f"  Air volume: {air_shape.Volume / 1e6:.1f} liters (inner hull)")
-except Exception:
+    if not params.get('air_as_solid', True):
+        air_shape = Part.Compound(inner_wires)
+        print("  Air stored as inner section wires (air_as_solid=false)")
+else:
     # Fallback: simple box
     air_shape = Part.makeBox(
         half_beam * 1.2, half_length * 1.4, hull_depth * 0.5,
@@ -414,7 +534,7 @@ except Exception:
 air_obj = vessel.newObject("Part::Feature", "Air_Inside__air")
 air_obj.Shape = air_shape
 air_obj.Placement = App.Placement(
-    Base.Vector(0, 0, params['deck_level']),
+    Base.Vector(0, 0, deck_level),
     App.Rotation())
 
 # ============================================================================
@@ -423,8 +543,8 @@ air_obj.Placement = App.Placement(
 
 doc.recompute()
 
-# Set visibility on Linux
-if platform.system() == 'Linux':
+# Set visibility on Linux; without a GUI there are no view providers
+if platform.system() == 'Linux' and App.GuiUp:
     def make_all_visible(obj_list):
         for obj in obj_list:
             try:
@@ -17,6 +17,9 @@ Usage:
 import sys
 import os
 import json
+import functools
+
+import numpy as np
 
 # Check if we're running in FreeCAD
 try:
@@ -51,29 +54,38 @@ def get_section_positions(params):
     Evenly spaced along hull, plus an explicit cut at the mast position.
     Returns list of (name, y_position) tuples sorted by Y position.
     """
-    hull_length = params.get('hull_length', params.get('loa', 6100))
-    num_sections = params.get('hull_sections', 7)
+    return list(compute_section_positions(
+        params.get('hull_length', params.get('loa', 6100)),
+        params.get('hull_sections', 7),
+        params.get('mast_y_position')))
+
 
+@functools.lru_cache(maxsize=None)
+def compute_section_positions(hull_length, num_sections, mast_y):
+    """Cached body plan stations for the given hull scalars, as a tuple."""
     # Hull is centered at Y=0 in the design, extending from -hull_length/2 to +hull_length/2
     half_length = hull_length / 2
 
-    positions = []
-    for i in range(num_sections):
+    if num_sections == 1:
+        # A single station sits amidships
+        ys = np.zeros(1)
+        spacing = hull_length
+    else:
         # Evenly spaced from bow to stern
-        y = -half_length + i * hull_length / (num_sections - 1)
-        # Small offset to avoid slicing exactly at shape boundaries
-        y_offset = y + 1.0 if abs(y) < 1 else y
-        positions.append((f"stn_{i}", y_offset))
+        ys = np.linspace(-half_length, half_length, num_sections)
+        spacing = hull_length / (num_sections - 1)
+    # Small offset to avoid slicing exactly at shape boundaries
+    ys = np.where(np.abs(ys) < 1, ys + 1.0, ys)
+    positions = [(f"stn_{i}", y) for i, y in enumerate(ys.tolist())]
 
     # Add mast station if it doesn't coincide with an existing station
-    mast_y = params.get('mast_y_position')
     if mast_y is not None:
-        min_gap = hull_length / (num_sections - 1) * 0.3
+        min_gap = spacing * 0.3
         if all(abs(y - mast_y) > min_gap for _, y in positions):
             positions.append(("stn_mast", mast_y))
             positions.sort(key=lambda p: p[1])
 
-    return positions
+    return tuple(positions)
 
 
 def get_waterline_positions(params):
@@ -81,10 +93,15 @@ def get_waterline_positions(params):
     Get Z positions for waterline cuts (full-breadth plan).
     Returns list of (name, z_position) tuples.
     """
-    hull_depth = params.get('hull_depth', 900)
-    deck_level = params.get('deck_level', 900)
-    draft = params.get('hull_draft', params.get('draft', 300))
+    return list(compute_waterline_positions(
+        params.get('deck_level', 900),
+        params.get('hull_draft', params.get('draft', 300)),
+        params.get('freeboard', 600)))
+
 
+@functools.lru_cache(maxsize=None)
+def compute_waterline_positions(deck_level, draft, freeboard):
+    """Cached waterline heights for the given hull scalars, as a tuple."""
     # Waterlines from bottom of hull to deck level
     # Include: bottom, a few intermediate levels, waterline, deck
     positions = []
@@ -99,7 +116,6 @@ def get_waterline_positions(params):
         positions.append((f"wl_below_{i}", z))
 
     # Above waterline
-    freeboard = params.get('freeboard', 600)
     step = freeboard / 3
     for i in range(1, 3):
         z = i * step
@@ -111,20 +127,159 @@ def get_waterline_positions(params):
 
     # Sort by Z position
     positions.sort(key=lambda x: x[1])
-    return positions
+    return tuple(positions)
+
+
+def slice_shape_safely(i, shape, normal, position):
+    """Slice a single shape, returning no wires if OCCT raises."""
+    try:
+        return shape.slice(normal, position) or []
+    except Exception as e:
+        print(f"      Warning: Could not slice shape {i}: {e}", flush=True)
+        return []
 
 
 def slice_shapes_safely(shapes, normal, position):
-    """Slice shapes one by one to avoid segfaults with complex compounds."""
-    all_wires = []
-    for i, shape in enumerate(shapes):
-        try:
-            wires = shape.slice(normal, position)
-            if wires:
-                all_wires.extend(wires)
-        except Exception as e:
-            print(f"      Warning: Could not slice shape {i}: {e}", flush=True)
-    return all_wires
+    """Slice shapes one by one to avoid segfaults with complex compounds.
+
+    A segfault in OCCT cannot be caught, so there is no safe compound-first
+    path with a per-shape fallback.
+    """
+    return [wire for i, shape in enumerate(shapes)
+            for wire in slice_shape_safely(i, shape, normal, position)]
+
+
+def sample_spacing(wires, target_size, svg_units_per_sample=2.0):
+    """Model distance between edge samples for a drawing of target_size.
+
+    The drawing scale is estimated from the wires' overall bounding box,
+    so that one sample lands roughly every svg_units_per_sample.
+    """
+    boxes = [wire.BoundBox for wire in wires]
+    if not boxes:
+        return 1.0
+    extent = max(
+        max(bb.XMax for bb in boxes) - min(bb.XMin for bb in boxes),
+        max(bb.YMax for bb in boxes) - min(bb.YMin for bb in boxes),
+        max(bb.ZMax for bb in boxes) - min(bb.ZMin for bb in boxes),
+        0.1)
+    return svg_units_per_sample * extent / target_size
+
+
+# Edges and wires shorter than this (mm) are construction debris, not lines
+MIN_EDGE_LENGTH = 1e-3
+
+
+def discretize_edge(edge, spacing):
+    """Sample an edge into an (N, 3) array of model coordinates.
+
+    Straight edges only need their end points; curves get one sample per
+    spacing, clamped to 8..64.
+    """
+    if isinstance(edge.Curve, Part.Line):
+        count = 2
+    else:
+        count = max(8, min(64, int(edge.Length / spacing)))
+    return np.array([(p.x, p.y, p.z) for p in edge.discretize(count)])
+
+
+def discretize_wires(wires, spacing):
+    """Sample every edge of wires once; returns a list of (N, 3) arrays.
+
+    The samples are unclipped so full and clipped drawings can share them.
+    Zero-length wires and edges are skipped without being sampled.
+    """
+    return [discretize_edge(edge, spacing)
+            for wire in wires
+            if wire.Edges and wire.Length >= MIN_EDGE_LENGTH
+            for edge in wire.Edges
+            if edge.Length >= MIN_EDGE_LENGTH]
+
+
+# (2, 3) matrices taking model (x, y, z) to drawing (x, y), with the
+# drawing's y axis pointing down. Unknown views fall back to 'XY'.
+VIEW_PROJECTIONS = {
+    'XZ': np.array([[1.0, 0.0, 0.0], [0.0, 0.0, -1.0]]),
+    'XY': np.array([[1.0, 0.0, 0.0], [0.0, -1.0, 0.0]]),
+    'YX': np.array([[0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]]),
+    'YZ': np.array([[0.0, 1.0, 0.0], [0.0, 0.0, -1.0]]),
+}
+
+
+def project_points(points, view):
+    """Project (N, 3) model points to (N, 2) drawing coordinates (y down)."""
+    return points @ VIEW_PROJECTIONS.get(view, VIEW_PROJECTIONS['XY']).T
+
+
+def clip_edge_points(points, clip_z):
+    """Split an (N, 3) sampled edge into runs of points with z <= clip_z.
+
+    Segments crossing clip_z are cut at the interpolated crossing point,
+    so an edge sampled only at its end points (a straight line) keeps its
+    visible part instead of collapsing to a single point.
+    """
+    below = points[:, 2] <= clip_z
+    if below.all():
+        return [points]
+    if not below.any():
+        return []
+
+    runs = []
+    run = []
+    prev = prev_below = None
+    for point, point_below in zip(points, below.tolist()):
+        if prev is not None and point_below != prev_below:
+            t = (clip_z - prev[2]) / (point[2] - prev[2])
+            crossing = prev + t * (point - prev)
+            if not run or not np.array_equal(run[-1], crossing):
+                run.append(crossing)
+            if not point_below:
+                runs.append(np.array(run))
+                run = []
+        if point_below and not (run and np.array_equal(run[-1], point)):
+            run.append(point)
+        prev, prev_below = point, point_below
+    if run:
+        runs.append(np.array(run))
+    return runs
+
+
+def project_edges(edge_points, view, clip_z=None):
+    """Clip and project sampled edges in one pass.
+
+    Returns:
+        (edge_arrays, bounds) where edge_arrays holds one projected (N, 2)
+        array per non-empty run of edge points and bounds is
+        (min_xy, max_xy), or None if no points remain.
+    """
+    edge_arrays = []
+    for points in edge_points:
+        if not len(points):
+            continue
+        runs = [points] if clip_z is None else clip_edge_points(points, clip_z)
+        edge_arrays.extend(project_points(run, view) for run in runs)
+
+    if not edge_arrays:
+        return edge_arrays, None
+    stacked = np.concatenate(edge_arrays)
+    return edge_arrays, (stacked.min(axis=0), stacked.max(axis=0))
+
+
+@functools.lru_cache(maxsize=None)
+def svg_path_template(point_count):
+    """printf-style path element template for point_count points."""
+    return ('<path d="M %.2f %.2f'
+            + ' L %.2f %.2f' * (point_count - 1)
+            + '"/>\n')
+
+
+def svg_path_element(xy, scale, offset_x, offset_y):
+    """Format projected points as an SVG path element line.
+
+    All coordinates go through a single printf-style format call.
+    """
+    svg_xy = xy * scale + (offset_x, offset_y)
+    return svg_path_template(len(svg_xy)) % tuple(svg_xy.ravel().tolist())
 
 
 def export_wires_to_svg(wires, svg_path, view='XZ', target_size=800,
@@ -139,108 +294,29 @@ def export_wires_to_svg(wires, svg_path, view='XZ', target_size=800,
         stroke_width: Line width in SVG
         clip_z: Maximum Z value to include
     """
-    all_points = []
-    for wire in wires:
-        for edge in wire.Edges:
-            points = edge.discretize(50)
-            if clip_z is not None:
-                points = [p for p in points if p.z <= clip_z]
-            all_points.extend(points)
-
-    if not all_points:
-        return
+    spacing = sample_spacing(wires, target_size)
+    write_edges_svg(discretize_wires(wires, spacing), svg_path, view=view,
+                    target_size=target_size, stroke_width=stroke_width,
+                    clip_z=clip_z)
 
-    def map_point(p):
-        if view == 'XZ':
-            return (p.x, -p.z)
-        elif view == 'XY':
-            return (p.x, -p.y)
-        elif view == 'YX':
-            return (p.y, -p.x)
-        elif view == 'YZ':
-            return (p.y, -p.z)
-        return (p.x, -p.y)
-
-    mapped = [map_point(p) for p in all_points]
-    min_x = min(p[0] for p in mapped)
-    max_x = max(p[0] for p in mapped)
-    min_y = min(p[1] for p in mapped)
-    max_y = max(p[1] for p in mapped)
 
-    extent_x = max(max_x - min_x, 0.1)
-    extent_y = max(max_y - min_y, 0.1)
+def export_wires_to_svg_dual(wires, full_path, clipped_path, clip_z,
+                             view='XZ', target_size=800, stroke_width=1.0):
+    """Export full and Z-clipped SVGs of wires from one discretization."""
+    edge_points = discretize_wires(wires, sample_spacing(wires, target_size))
+    write_edges_svg(edge_points, full_path, view=view,
+                    target_size=target_size, stroke_width=stroke_width)
+    write_edges_svg(edge_points, clipped_path, view=view,
+                    target_size=target_size, stroke_width=stroke_width,
+                    clip_z=clip_z)
 
-    scale = target_size / max(extent_x, extent_y)
-    margin = 40
-    scale_bar_height = 30
-
-    width = extent_x * scale + 2 * margin
-    height = extent_y * scale + 2 * margin + scale_bar_height
-    offset_x = -min_x * scale + margin
-    offset_y = -min_y * scale + margin
-
-    svg_lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
-        f'width="{width:.1f}" height="{height:.1f}" '
-        f'viewBox="0 0 {width:.1f} {height:.1f}">',
-        f'<g fill="none" stroke="black" stroke-width="{stroke_width}">'
-    ]
 
-    for wire in wires:
-        for edge in wire.Edges:
-            points = edge.discretize(50)
-            if clip_z is not None:
-                points = [p for p in points if p.z <= clip_z]
-            if len(points) >= 2:
-                path_data = []
-                for i, p in enumerate(points):
-                    x, y = map_point(p)
-                    sx = x * scale + offset_x
-                    sy = y * scale + offset_y
-                    if i == 0:
-                        path_data.append(f"M {sx:.2f} {sy:.2f}")
-                    else:
-                        path_data.append(f"L {sx:.2f} {sy:.2f}")
-                svg_lines.append(f'<path d="{" ".join(path_data)}"/>')
-
-    svg_lines.append('</g>')
-
-    # Scale bar
-    max_extent_mm = max(extent_x, extent_y)
-    if max_extent_mm > 5000:
-        bar_length_mm, bar_label = 1000, "1 m"
-    elif max_extent_mm > 2000:
-        bar_length_mm, bar_label = 500, "0.5 m"
-    elif max_extent_mm > 500:
-        bar_length_mm, bar_label = 200, "200 mm"
-    else:
-        bar_length_mm, bar_label = 100, "100 mm"
-
-    bar_length_svg = bar_length_mm * scale
-    bar_x = margin
-    bar_y = height - 15
-
-    svg_lines.append('<g stroke="black" stroke-width="1" fill="black">')
-    svg_lines.append(
-        f'<line x1="{bar_x:.1f}" y1="{bar_y:.1f}" '
-        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y:.1f}"/>')
-    svg_lines.append(
-        f'<line x1="{bar_x:.1f}" y1="{bar_y - 5:.1f}" '
-        f'x2="{bar_x:.1f}" y2="{bar_y + 5:.1f}"/>')
-    svg_lines.append(
-        f'<line x1="{bar_x + bar_length_svg:.1f}" y1="{bar_y - 5:.1f}" '
-        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y + 5:.1f}"/>')
-    svg_lines.append(
-        f'<text x="{bar_x + bar_length_svg / 2:.1f}" y="{bar_y - 8:.1f}" '
-        f'text-anchor="middle" font-family="sans-serif" font-size="10">'
-        f'{bar_label}</text>')
-    svg_lines.append('</g>')
-
-    svg_lines.append('</svg>')
-
-    with open(svg_path, 'w') as f:
-        f.write('\n'.join(svg_lines))
+def write_edges_svg(edge_points, svg_path, view='XZ', target_size=800,
+                    stroke_width=1.0, clip_z=None):
+    """Write sampled edges (from discretize_wires) to an SVG file."""
+    write_edge_groups_svg([(edge_points, 'black')], svg_path, view=view,
+                          target_size=target_size, stroke_width=stroke_width,
+                          clip_z=clip_z)
 
 
 def export_wire_groups_to_svg(wire_groups, svg_path, view='XZ',
@@ -255,110 +331,135 @@ def export_wire_groups_to_svg(wire_groups, svg_path, view='XZ',
         stroke_width: Line width in SVG
         clip_z: Maximum Z value to include
     """
-    all_points = []
-    for wires, color in wire_groups:
-        for wire in wires:
-            for edge in wire.Edges:
-                points = edge.discretize(50)
-                if clip_z is not None:
-                    points = [p for p in points if p.z <= clip_z]
-                all_points.extend(points)
-
-    if not all_points:
+    spacing = sample_spacing(
+        [wire for wires, _ in wire_groups for wire in wires], target_size)
+    write_edge_groups_svg(
+        [(discretize_wires(wires, spacing), color)
+         for wires, color in wire_groups],
+        svg_path, view=view, target_size=target_size,
+        stroke_width=stroke_width, clip_z=clip_z)
+
+
+def export_wire_groups_to_svg_dual(wire_groups, full_path, clipped_path,
+                                   clip_z, view='XZ', target_size=800,
+                                   stroke_width=1.0):
+    """Export full and Z-clipped SVGs of wire groups from one discretization."""
+    spacing = sample_spacing(
+        [wire for wires, _ in wire_groups for wire in wires], target_size)
+    point_groups = [(discretize_wires(wires, spacing), color)
+                    for wires, color in wire_groups]
+    write_edge_groups_svg(point_groups, full_path, view=view,
+                          target_size=target_size, stroke_width=stroke_width)
+    write_edge_groups_svg(point_groups, clipped_path, view=view,
+                          target_size=target_size, stroke_width=stroke_width,
+                          clip_z=clip_z)
+
+
+# Write buffer for SVG output, large enough for a combined plan in one flush
+SVG_WRITE_BUFFER = 1 << 20
+
+
+def write_edge_groups_svg(point_groups, svg_path, view='XZ', target_size=800,
+                          stroke_width=1.0, clip_z=None):
+    """Write (sampled edges, color) groups to an SVG file."""
+    group_arrays = []
+    group_bounds = []
+    for edge_points, color in point_groups:
+        edge_arrays, bounds = project_edges(edge_points, view, clip_z)
+        group_arrays.append((edge_arrays, color))
+        if bounds is not None:
+            group_bounds.append(bounds)
+
+    if not group_bounds:
         return
 
-    def map_point(p):
-        if view == 'XZ':
-            return (p.x, -p.z)
-        elif view == 'XY':
-            return (p.x, -p.y)
-        elif view == 'YX':
-            return (p.y, -p.x)
-        elif view == 'YZ':
-            return (p.y, -p.z)
-        return (p.x, -p.y)
-
-    mapped = [map_point(p) for p in all_points]
-    min_x = min(p[0] for p in mapped)
-    max_x = max(p[0] for p in mapped)
-    min_y = min(p[1] for p in mapped)
-    max_y = max(p[1] for p in mapped)
-
-    extent_x = max(max_x - min_x, 0.1)
-    extent_y = max(max_y - min_y, 0.1)
+    min_xy = np.min([lo for lo, _ in group_bounds], axis=0)
+    max_xy = np.max([hi for _, hi in group_bounds], axis=0)
+    layout = svg_layout(min_xy, max_xy, target_size)
 
-    scale = target_size / max(extent_x, extent_y)
-    margin = 40
-    scale_bar_height = 30
+    # Stream elements straight to a large file buffer as they are formatted
+    with open(svg_path, 'w', buffering=SVG_WRITE_BUFFER) as svg:
+        svg.write(svg_header(layout['width'], layout['height']))
 
-    width = extent_x * scale + 2 * margin
-    height = extent_y * scale + 2 * margin + scale_bar_height
-    offset_x = -min_x * scale + margin
-    offset_y = -min_y * scale + margin
+        for edge_arrays, color in group_arrays:
+            svg.write(f'<g fill="none" stroke="{color}" '
+                      f'stroke-width="{stroke_width}">\n')
+            for xy in edge_arrays:
+                if len(xy) >= 2:
+                    svg.write(svg_path_element(
+                        xy, layout['scale'], layout['offset_x'],
+                        layout['offset_y']))
+            svg.write('</g>\n')
 
-    svg_lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
-        f'width="{width:.1f}" height="{height:.1f}" '
-        f'viewBox="0 0 {width:.1f} {height:.1f}">'
-    ]
+        svg.write(svg_scale_bar(layout))
+        svg.write('</svg>\n')
 
-    for wires, color in wire_groups:
-        svg_lines.append(
-            f'<g fill="none" stroke="{color}" stroke-width="{stroke_width}">')
-        for wire in wires:
-            for edge in wire.Edges:
-                points = edge.discretize(50)
-                if clip_z is not None:
-                    points = [p for p in points if p.z <= clip_z]
-                if len(points) >= 2:
-                    path_data = []
-                    for i, p in enumerate(points):
-                        x, y = map_point(p)
-                        sx = x * scale + offset_x
-                        sy = y * scale + offset_y
-                        if i == 0:
-                            path_data.append(f"M {sx:.2f} {sy:.2f}")
-                        else:
-                            path_data.append(f"L {sx:.2f} {sy:.2f}")
-                    svg_lines.append(f'<path d="{" ".join(path_data)}"/>')
-        svg_lines.append('</g>')
-
-    # Scale bar
-    max_extent_mm = max(extent_x, extent_y)
-    if max_extent_mm > 5000:
-        bar_length_mm, bar_label = 1000, "1 m"
-    elif max_extent_mm > 2000:
-        bar_length_mm, bar_label = 500, "0.5 m"
-    elif max_extent_mm > 500:
-        bar_length_mm, bar_label = 200, "200 mm"
-    else:
-        bar_length_mm, bar_label = 100, "100 mm"
 
-    bar_length_svg = bar_length_mm * scale
-    bar_x = margin
-    bar_y = height - 15
+def svg_layout(min_xy, max_xy, target_size, margin=40, scale_bar_height=30):
+    """Scale, offsets and page size for drawing bounds (min_xy, max_xy).
 
-    svg_lines.append('<g stroke="black" stroke-width="1" fill="black">')
-    svg_lines.append(
+    Returns:
+        Dict with scale, offset_x, offset_y, width, height, margin and
+        max_extent (the larger drawing extent in mm).
+    """
+    min_x, min_y = min_xy
+    max_x, max_y = max_xy
+    extent_x = max(max_x - min_x, 0.1)
+    extent_y = max(max_y - min_y, 0.1)
+    max_extent = max(extent_x, extent_y)
+    scale = target_size / max_extent
+    return {
+        'scale': scale,
+        'offset_x': -min_x * scale + margin,
+        'offset_y': -min_y * scale + margin,
+        'width': extent_x * scale + 2 * margin,
+        'height': extent_y * scale + 2 * margin + scale_bar_height,
+        'margin': margin,
+        'max_extent': max_extent,
+    }
+
+
+def svg_header(width, height):
+    """XML declaration and opening svg element."""
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+            f'width="{width:.1f}" height="{height:.1f}" '
+            f'viewBox="0 0 {width:.1f} {height:.1f}">\n')
+
+
+# (drawing extent above which it applies in mm, bar length in mm, label),
+# largest first; the last row catches everything else
+SCALE_BARS = (
+    (5000, 1000, "1 m"),
+    (2000, 500, "0.5 m"),
+    (500, 200, "200 mm"),
+    (float('-inf'), 100, "100 mm"),
+)
+
+
+def svg_scale_bar(layout):
+    """Scale bar group placed below the drawing described by layout."""
+    max_extent_mm = layout['max_extent']
+    bar_length_mm, bar_label = next(
+        (length, label) for threshold, length, label in SCALE_BARS
+        if max_extent_mm > threshold)
+
+    bar_length_svg = bar_length_mm * layout['scale']
+    bar_x = layout['margin']
+    bar_y = layout['height'] - 15
+
+    return (
+        '<g stroke="black" stroke-width="1" fill="black">\n'
         f'<line x1="{bar_x:.1f}" y1="{bar_y:.1f}" '
-        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y:.1f}"/>')
-    svg_lines.append(
+        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y:.1f}"/>\n'
         f'<line x1="{bar_x:.1f}" y1="{bar_y - 5:.1f}" '
-        f'x2="{bar_x:.1f}" y2="{bar_y + 5:.1f}"/>')
-    svg_lines.append(
+        f'x2="{bar_x:.1f}" y2="{bar_y + 5:.1f}"/>\n'
         f'<line x1="{bar_x + bar_length_svg:.1f}" y1="{bar_y - 5:.1f}" '
-        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y + 5:.1f}"/>')
-    svg_lines.append(
+        f'x2="{bar_x + bar_length_svg:.1f}" y2="{bar_y + 5:.1f}"/>\n'
         f'<text x="{bar_x + bar_length_svg / 2:.1f}" y="{bar_y - 8:.1f}" '
         f'text-anchor="middle" font-family="sans-serif" font-size="10">'
-        f'{bar_label}</text>')
-    svg_lines.append('</g>')
-
-    svg_lines.append('</svg>')
-
-    with open(svg_path, 'w') as f:
-        f.write('\n'.join(svg_lines))
+        f'{bar_label}</text>\n'
+        '</g>\n')
 
 
 def collect_shapes(design_doc):
@@ -405,9 +506,13 @@ def collect_shapes(design_doc):
             if not parent_placement.isIdentity():
                 shape = shape.transformed(parent_placement.toMatrix())
 
-        if shape.Volume > 1:
+        # Bounding box volume is a cheap stand-in for the exact OCCT volume
+        # when all we need is to reject degenerate shapes
+        bb = shape.BoundBox
+        if bb.XLength * bb.YLength * bb.ZLength > 1.0:
             shapes.append(shape)
-            print(f"  Added: {obj.Name} (Volume: {shape.Volume:.0f} mm3)")
+            print(f"  Added: {obj.Name} ({bb.XLength:.0f} x {bb.YLength:.0f} "
+                  f"x {bb.ZLength:.0f} mm)")
 
     return shapes
 
@@ -452,16 +557,16 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     print("Exporting profile view...", flush=True)
     try:
         normal = App.Vector(1, 0, 0)
-        wires = slice_shapes_safely(shapes, normal, 0.0)  # Exact centerline
+        # Exact centerline
+        wires = slice_shapes_safely(shapes, normal, 0.0)
         if wires:
-            # Full version with mast (for summary page and website)
-            svg_path = os.path.join(output_dir, f"{base_name}.profile.full.svg")
-            export_wires_to_svg(wires, svg_path, view='YZ')
-            print(f"  Exported profile (full): {svg_path}", flush=True)
-
-            # Clipped version without mast (for full-page detail)
+            # Full version with mast (for summary page and website) and
+            # clipped version without mast (for full-page detail)
+            full_path = os.path.join(output_dir, f"{base_name}.profile.full.svg")
             svg_path = os.path.join(output_dir, f"{base_name}.profile.svg")
-            export_wires_to_svg(wires, svg_path, view='YZ', clip_z=clip_z)
+            export_wires_to_svg_dual(wires, full_path, svg_path, clip_z,
+                                     view='YZ')
+            print(f"  Exported profile (full): {full_path}", flush=True)
             print(f"  Exported profile (clipped): {svg_path}", flush=True)
         else:
             print("  Warning: No wires for profile view", flush=True)
@@ -477,12 +582,14 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     print(f"Exporting {len(section_positions)} body plan sections...", flush=True)
 
     # Export individual section SVGs
+    section_wire_groups = []
     for name, y_pos in section_positions:
         try:
             print(f"  Slicing at Y={y_pos:.0f} for section '{name}'...", flush=True)
             normal = App.Vector(0, 1, 0)
             wires = slice_shapes_safely(shapes, normal, y_pos)
             if wires:
+                section_wire_groups.append((wires, 'black'))
                 svg_path = os.path.join(output_dir, f"{base_name}.section.{name}.svg")
                 export_wires_to_svg(wires, svg_path, view='XZ', clip_z=clip_z)
                 print(f"    Exported: {svg_path}", flush=True)
@@ -496,25 +603,15 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     # Export combined body plan (all sections overlayed in black)
     print("Exporting combined body plan...", flush=True)
     try:
-        normal = App.Vector(0, 1, 0)
-        wire_groups = []
-        for name, y_pos in section_positions:
-            wires = slice_shapes_safely(shapes, normal, y_pos)
-            if wires:
-                wire_groups.append((wires, 'black'))
-
-        if wire_groups:
-            # Full version with mast (for summary page and website)
-            svg_path = os.path.join(output_dir, f"{base_name}.bodyplan.full.svg")
-            export_wire_groups_to_svg(
-                wire_groups, svg_path, view='XZ', target_size=600)
-            print(f"  Exported combined body plan (full): {svg_path}", flush=True)
-
-            # Clipped version without mast (for full-page detail)
+        if section_wire_groups:
+            # Full version with mast (for summary page and website) and
+            # clipped version without mast (for full-page detail)
+            full_path = os.path.join(output_dir, f"{base_name}.bodyplan.full.svg")
             svg_path = os.path.join(output_dir, f"{base_name}.bodyplan.svg")
-            export_wire_groups_to_svg(
-                wire_groups, svg_path, view='XZ',
-                target_size=600, clip_z=clip_z)
+            export_wire_groups_to_svg_dual(
+                section_wire_groups, full_path, svg_path, clip_z,
+                view='XZ', target_size=600)
+            print(f"  Exported combined body plan (full): {full_path}", flush=True)
             print(f"  Exported combined body plan (clipped): {svg_path}", flush=True)
     except Exception as e:
         import traceback
@@ -528,12 +625,14 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     print(f"Exporting {len(waterline_positions)} full-breadth waterlines...", flush=True)
 
     # Export individual waterline SVGs
+    waterline_wire_groups = []
     for name, z_pos in waterline_positions:
         try:
             print(f"  Slicing at Z={z_pos:.0f} for waterline '{name}'...", flush=True)
             normal = App.Vector(0, 0, 1)
             wires = slice_shapes_safely(shapes, normal, z_pos)
             if wires:
+                waterline_wire_groups.append((wires, 'black'))
                 svg_path = os.path.join(output_dir, f"{base_name}.waterline.{name}.svg")
                 export_wires_to_svg(wires, svg_path, view='YX')
                 print(f"    Exported: {svg_path}", flush=True)
@@ -547,17 +646,10 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     # Export combined full-breadth plan (all waterlines overlayed)
     print("Exporting combined full-breadth plan...", flush=True)
     try:
-        normal = App.Vector(0, 0, 1)
-        wire_groups = []
-        for name, z_pos in waterline_positions:
-            wires = slice_shapes_safely(shapes, normal, z_pos)
-            if wires:
-                wire_groups.append((wires, 'black'))
-
-        if wire_groups:
+        if waterline_wire_groups:
             svg_path = os.path.join(output_dir, f"{base_name}.fullbreadth.svg")
-            export_wire_groups_to_svg(wire_groups, svg_path, view='YX',
-                                     target_size=800)
+            export_wire_groups_to_svg(waterline_wire_groups, svg_path,
+                                      view='YX', target_size=800)
             print(f"  Exported combined full-breadth: {svg_path}", flush=True)
     except Exception as e:
         import traceback
@@ -597,6 +689,21 @@ def create_lines_plan(design_path, params, output_dir, boat_name, config_name):
     return True
 
 
+# One station or waterline page in the LaTeX document
+FIGURE_TEMPLATE = (
+    "\\begin{{figure}}[H]\n"
+    "\\centering\n"
+    "\\IfFileExists{{{svg_name}.pdf}}{{%\n"
+    "    \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,"
+    "keepaspectratio]{{{svg_name}.pdf}}\n"
+    "}}{{%\n"
+    "    \\textit{{({kind} {name}: see {base_name}.FCStd)}}\n"
+    "}}\n"
+    "\\caption{{{caption}}}\n"
+    "\\end{{figure}}"
+)
+
+
 def generate_latex(boat_name, config_name, params, sections, waterlines,
                    base_name):
     """Generate LaTeX document for the keelboat lines plan."""
@@ -626,40 +733,23 @@ def generate_latex(boat_name, config_name, params, sections, waterlines,
         for name, z_pos in waterlines
     ])
 
-    # Generate section figure includes
-    section_figures = []
-    for name, y_pos in sections:
-        svg_name = f"{base_name}.section.{name}"
-        section_figures.append(
-            f"\\begin{{figure}}[H]\n"
-            f"\\centering\n"
-            f"\\IfFileExists{{{svg_name}.pdf}}{{%\n"
-            f"    \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,"
-            f"keepaspectratio]{{{svg_name}.pdf}}\n"
-            f"}}{{%\n"
-            f"    \\textit{{(Section {escape_latex(name)}: see {escape_latex(base_name)}.FCStd)}}\n"
-            f"}}\n"
-            f"\\caption{{Body Plan---Section at {escape_latex(name)} (Y={y_pos:.0f}mm)}}\n"
-            f"\\end{{figure}}"
-        )
-    section_figures_tex = "\n\n".join(section_figures)
-
-    waterline_figures = []
-    for name, z_pos in waterlines:
-        svg_name = f"{base_name}.waterline.{name}"
-        waterline_figures.append(
-            f"\\begin{{figure}}[H]\n"
-            f"\\centering\n"
-            f"\\IfFileExists{{{svg_name}.pdf}}{{%\n"
-            f"    \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,"
-            f"keepaspectratio]{{{svg_name}.pdf}}\n"
-            f"}}{{%\n"
-            f"    \\textit{{(Waterline {escape_latex(name)}: see {escape_latex(base_name)}.FCStd)}}\n"
-            f"}}\n"
-            f"\\caption{{Full-Breadth---Waterline {escape_latex(name)} (Z={z_pos:.0f}mm)}}\n"
-            f"\\end{{figure}}"
-        )
-    waterline_figures_tex = "\n\n".join(waterline_figures)
+    base_name_tex = escape_latex(base_name)
+
+    section_figures_tex = "\n\n".join(
+        FIGURE_TEMPLATE.format(
+            svg_name=f"{base_name}.section.{name}", kind="Section",
+            name=escape_latex(name), base_name=base_name_tex,
+            caption=f"Body Plan---Section at {escape_latex(name)} "
+                    f"(Y={y_pos:.0f}mm)")
+        for name, y_pos in sections)
+
+    waterline_figures_tex = "\n\n".join(
+        FIGURE_TEMPLATE.format(
+            svg_name=f"{base_name}.waterline.{name}", kind="Waterline",
+            name=escape_latex(name), base_name=base_name_tex,
+            caption=f"Full-Breadth---Waterline {escape_latex(name)} "
+                    f"(Z={z_pos:.0f}mm)")
+        for name, z_pos in waterlines)
 
     latex = f"""\\documentclass[a3paper,landscape]{{article}}
 \\usepackage[margin=20mm]{{geometry}}
@@ -681,7 +771,7 @@ def generate_latex(boat_name, config_name, params, sections, waterlines,
 \\IfFileExists{{{base_name}.profile.full.pdf}}{{%
 \\includegraphics[width=\\textwidth,keepaspectratio]{{{base_name}.profile.full.pdf}}
 }}{{%
-    \\textit{{(Profile: see {escape_latex(base_name)}.FCStd)}}
+    \\textit{{(Profile: see {base_name_tex}.FCStd)}}
 }}
 \\end{{minipage}}
 \\hfill
@@ -767,7 +857,7 @@ Ballast Ratio & {ballast_ratio * 100:.1f}\\% \\\\
 \\IfFileExists{{{base_name}.profile.pdf}}{{%
     \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,keepaspectratio]{{{base_name}.profile.pdf}}
 }}{{%
-    \\textit{{(Profile: see {escape_latex(base_name)}.FCStd)}}
+    \\textit{{(Profile: see {base_name_tex}.FCStd)}}
 }}
 \\caption{{Profile---Centerline section (X=0)}}
 \\end{{figure}}
@@ -781,7 +871,7 @@ Ballast Ratio & {ballast_ratio * 100:.1f}\\% \\\\
 \\IfFileExists{{{base_name}.bodyplan.pdf}}{{%
     \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,keepaspectratio]{{{base_name}.bodyplan.pdf}}
 }}{{%
-    \\textit{{(Body plan: see {escape_latex(base_name)}.FCStd)}}
+    \\textit{{(Body plan: see {base_name_tex}.FCStd)}}
 }}
 \\caption{{Combined body plan---All sections overlayed}}
 \\end{{figure}}
@@ -797,7 +887,7 @@ Ballast Ratio & {ballast_ratio * 100:.1f}\\% \\\\
 \\IfFileExists{{{base_name}.fullbreadth.pdf}}{{%
     \\includegraphics[width=0.95\\textwidth,height=0.85\\textheight,keepaspectratio]{{{base_name}.fullbreadth.pdf}}
 }}{{%
-    \\textit{{(Full-breadth plan: see {escape_latex(base_name)}.FCStd)}}
+    \\textit{{(Full-breadth plan: see {base_name_tex}.FCStd)}}
 }}
 \\caption{{Combined full-breadth plan---All waterlines overlayed}}
 \\end{{figure}}
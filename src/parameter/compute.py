@@ -1,64 +1,217 @@
 """Compute derived parameters from base parameters (Keelboat-specific)."""
 
-import math
-from typing import Dict, Any
+import os
+import functools
+import operator
+from collections import namedtuple
+from typing import Dict, Any, Tuple
 
+import numpy as np
 
-def compute_derived(base: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Compute all derived parameters from base parameters.
-    Returns a complete parameter dictionary with both base and derived values.
-    """
-    params = base.copy()
+try:
+    if os.environ.get('KEELBOAT_NO_JIT'):
+        # Short-lived processes call compute_derived once; skip numba's
+        # import and compile cost there and run the core as plain Python
+        raise ImportError('KEELBOAT_NO_JIT is set')
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the arithmetic core runs as plain Python
+    def njit(*args, **kwargs):
+        def decorate(func):
+            return func
+        return decorate
+
+
+# Unit conversions, applied as multiplications
+MM_TO_M = 1e-3
+MM2_TO_M2 = 1e-6
+MM3_TO_M3 = 1e-9
+KG_TO_T = 1e-3
+
+# Estimation constants
+PRISMATIC_COEFFICIENT = 0.55  # typical for a daysailer
+WATERLINE_BEAM_FACTOR = 0.85
+SEAWATER_DENSITY = 1025.0  # kg/m3
+LEAD_DENSITY = 11340.0  # kg/m3
+KEEL_VOLUME_FACTOR = 0.7  # foil section area / (chord * thickness)
+
+# Displacement per mm3 of LWL * hull beam * hull draft, in kg
+DISPLACEMENT_K = (PRISMATIC_COEFFICIENT * WATERLINE_BEAM_FACTOR
+                  * SEAWATER_DENSITY * MM3_TO_M3)
+
+# Lead ballast per mm2 of keel area * mm of root thickness, in kg
+BALLAST_K = KEEL_VOLUME_FACTOR * LEAD_DENSITY * MM3_TO_M3
+
+# Base parameters read by derived_values, in argument order
+BASE_KEYS = (
+    'keel_root_chord', 'keel_tip_chord', 'keel_span', 'keel_thickness_ratio',
+    'hull_depth', 'hull_beam', 'freeboard', 'lwl',
+    'mast_height', 'boom_length',
+    'hull_length', 'mast_position_from_bow', 'rudder_offset_from_stern',
+)
+
+# Reads the BASE_KEYS values out of a parameter dict in one C-level call
+get_base_values = operator.itemgetter(*BASE_KEYS)
+
+# Base parameters read by compute_derived_minimal, in unpacking order
+get_minimal_values = operator.itemgetter(
+    'hull_depth', 'freeboard', 'lwl', 'hull_beam', 'keel_span')
+
+# Derived parameters returned by derived_values, in tuple order
+DERIVED_KEYS = (
+    'keel_mean_chord', 'keel_area_mm2', 'keel_aspect_ratio',
+    'keel_root_thickness', 'keel_tip_thickness',
+    'hull_midship_depth', 'hull_waterline_beam',
+    'hull_draft', 'total_draft',
+    'displacement_estimate_kg', 'sail_area_m2',
+    'mast_y_position', 'rudder_y_position',
+    'keel_ballast_kg_estimate', 'ballast_ratio',
+    'sail_area_displacement_ratio',
+)
 
+# Immutable derived values, fields in DERIVED_KEYS order
+DerivedParams = namedtuple('DerivedParams', DERIVED_KEYS)
+
+# One contiguous float64 record of derived values, fields in DERIVED_KEYS order
+DERIVED_DTYPE = np.dtype([(key, np.float64) for key in DERIVED_KEYS])
+
+
+def derived_values(keel_root, keel_tip, keel_span, keel_thickness_ratio,
+                   hull_depth, hull_beam, freeboard, lwl,
+                   mast_h, boom_l,
+                   hull_length, mast_position_from_bow,
+                   rudder_offset_from_stern):
+    """Arithmetic shared by compute_derived and compute_derived_batch.
+
+    Works on float scalars and NumPy arrays alike, without branches.
+    Returns the values for DERIVED_KEYS.
+    """
     # Keel geometry
-    keel_root = base['keel_root_chord']
-    keel_tip = base['keel_tip_chord']
-    keel_span = base['keel_span']
-    params['keel_mean_chord'] = (keel_root + keel_tip) / 2
-    params['keel_area_mm2'] = params['keel_mean_chord'] * keel_span
-    params['keel_aspect_ratio'] = keel_span / params['keel_mean_chord']
-    params['keel_root_thickness'] = keel_root * base['keel_thickness_ratio']
-    params['keel_tip_thickness'] = keel_tip * base['keel_thickness_ratio']
+    keel_mean_chord = (keel_root + keel_tip) * 0.5
+    keel_area_mm2 = keel_mean_chord * keel_span
+    keel_aspect_ratio = keel_span / keel_mean_chord
+    keel_root_thickness = keel_root * keel_thickness_ratio
+    keel_tip_thickness = keel_tip * keel_thickness_ratio
 
     # Hull wetted dimensions (approximate)
-    params['hull_midship_depth'] = base['hull_depth']
-    params['hull_waterline_beam'] = base['hull_beam'] * 0.85
+    hull_midship_depth = hull_depth
+    hull_waterline_beam = hull_beam * WATERLINE_BEAM_FACTOR
 
     # Draft breakdown
-    params['hull_draft'] = base['hull_depth'] - base['freeboard']
-    params['total_draft'] = params['hull_draft'] + keel_span
+    hull_draft = hull_depth - freeboard
+    total_draft = hull_draft + keel_span
 
     # Displacement estimate (for initial guess in buoyancy solver)
-    # Prismatic coefficient ~0.55 for a daysailer
-    cp = 0.55
-    lwl_m = base['lwl'] / 1000
-    bwl_m = params['hull_waterline_beam'] / 1000
-    draft_m = params['hull_draft'] / 1000
-    params['displacement_estimate_kg'] = cp * lwl_m * bwl_m * draft_m * 1025
+    displacement_estimate_kg = DISPLACEMENT_K * lwl * hull_beam * hull_draft
 
     # Sail area (mainsail only, approximate triangle)
-    mast_h = base['mast_height']
-    boom_l = base['boom_length']
-    params['sail_area_m2'] = 0.5 * (mast_h / 1000) * (boom_l / 1000)
+    sail_area_m2 = 0.5 * MM2_TO_M2 * mast_h * boom_l
 
     # Mast step position (Y coordinate, from midship)
-    params['mast_y_position'] = base['hull_length'] / 2 - base['mast_position_from_bow']
+    mast_y_position = hull_length * 0.5 - mast_position_from_bow
 
     # Rudder position (Y coordinate, near stern)
-    params['rudder_y_position'] = -(base['hull_length'] / 2 - base['rudder_offset_from_stern'])
+    rudder_y_position = rudder_offset_from_stern - hull_length * 0.5
 
     # Ballast ratio estimate (keel volume * lead density / displacement)
-    keel_vol_m3 = (params['keel_area_mm2'] * params['keel_root_thickness'] * 0.7) / 1e9
-    params['keel_ballast_kg_estimate'] = keel_vol_m3 * 11340
-    if params['displacement_estimate_kg'] > 0:
-        params['ballast_ratio'] = (params['keel_ballast_kg_estimate'] /
-                                   params['displacement_estimate_kg'])
-
-    # Stability indices
-    params['sail_area_displacement_ratio'] = (
-        params['sail_area_m2'] /
-        (params['displacement_estimate_kg'] / 1000) ** (2/3)
-    )
-
-    return params
+    keel_ballast_kg_estimate = BALLAST_K * keel_area_mm2 * keel_root_thickness
+    # 0.0 for a degenerate (<= 0) displacement. Masking by the comparison
+    # rather than np.where keeps this branchless and scalar-typed under numba;
+    # the clamped divisor only keeps the masked-out quotient finite.
+    ballast_ratio = (displacement_estimate_kg > 0) * (
+        keel_ballast_kg_estimate / np.maximum(displacement_estimate_kg, 1e-30))
+
+    # Stability indices; (d / 1000) ** (2/3) as one libm pow, which the JIT
+    # and NumPy paths share (their cbrt implementations differ in the last
+    # bit). 0.0 for a degenerate displacement, masked like ballast_ratio
+    displacement_t = displacement_estimate_kg * KG_TO_T
+    sail_area_displacement_ratio = (displacement_estimate_kg > 0) * (
+        sail_area_m2 / np.maximum(displacement_t, 1e-30) ** (2 / 3))
+
+    return (keel_mean_chord, keel_area_mm2, keel_aspect_ratio,
+            keel_root_thickness, keel_tip_thickness,
+            hull_midship_depth, hull_waterline_beam,
+            hull_draft, total_draft,
+            displacement_estimate_kg, sail_area_m2,
+            mast_y_position, rudder_y_position,
+            keel_ballast_kg_estimate, ballast_ratio,
+            sail_area_displacement_ratio)
+
+
+# Scalar core of compute_derived, JIT-compiled when numba is present.
+# No fastmath, so results match the plain-Python path bit for bit, and
+# NumPy's error model, so degenerate input (zero chord or displacement)
+# gives inf/nan exactly like the NumPy scalars fed to the plain path.
+derived_core = njit(
+    'UniTuple(float64, 16)(' + ', '.join(['float64'] * 13) + ')',
+    cache=True, error_model='numpy')(derived_values)
+
+
+def uncached_derived_core(*values):
+    """derived_core with its result wrapped as DerivedParams."""
+    return DerivedParams._make(derived_core(*values))
+
+
+# Safe to share between callers since DerivedParams is immutable
+cached_derived_core = functools.lru_cache(maxsize=256)(uncached_derived_core)
+
+
+def derived_params(base: Dict[str, Any], cache: bool = True) -> DerivedParams:
+    """
+    Compute the derived parameters only, without copying base.
+    Callers that need the union merge it once where it is needed, e.g. via
+    DerivedParams._asdict().
+    Results are memoized on the base values unless cache is False.
+    """
+    core = cached_derived_core if cache else uncached_derived_core
+    return core(*map(np.float64, get_base_values(base)))
+
+
+def compute_derived(base: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute all derived parameters from base parameters.
+    Returns a complete parameter dictionary with both base and derived values,
+    as the shipshape.parameter plugin interface expects.
+    """
+    return {**base, **derived_params(base)._asdict()}
+
+
+compute_derived.cache_clear = cached_derived_core.cache_clear
+
+
+def compute_derived_minimal(base: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Compute only (displacement_estimate_kg, total_draft).
+    Fast path for solver loops that need nothing else from compute_derived;
+    inputs are converted like derived_params, so the values and types match.
+    """
+    hull_depth, freeboard, lwl, hull_beam, keel_span = map(
+        np.float64, get_minimal_values(base))
+    hull_draft = hull_depth - freeboard
+    displacement = DISPLACEMENT_K * lwl * hull_beam
+    return displacement * hull_draft, hull_draft + keel_span
+
+
+def derived_record(base: Dict[str, Any]) -> np.void:
+    """
+    Compute the derived parameters as a single DERIVED_DTYPE record.
+    """
+    record = np.zeros((), DERIVED_DTYPE)
+    record[()] = cached_derived_core(*map(np.float64, get_base_values(base)))
+    return record[()]
+
+
+def compute_derived_batch(base_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Compute derived parameters for many boats at once.
+    Takes one array (or scalar) per base parameter, broadcast to a common
+    shape, and returns a DERIVED_DTYPE array of that shape; index it by
+    field name for one derived parameter across the batch.
+    """
+    inputs = np.broadcast_arrays(
+        *[np.asarray(values, dtype=np.float64)
+          for values in get_base_values(base_arrays)])
+    derived = np.empty(inputs[0].shape, DERIVED_DTYPE)
+    for key, values in zip(DERIVED_KEYS, derived_values(*inputs)):
+        derived[key] = values
+    return derived